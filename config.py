@@ -1,55 +1,78 @@
 """Configuration management for Reddit Discord notifier."""
 import os
-from typing import List
-from dotenv import load_dotenv
+from typing import Dict, Optional, Tuple
+from dotenv import dotenv_values
 
-# Load environment variables from .env file
-load_dotenv()
+# Parse the .env file once and layer the process environment on top of it
+# (same precedence as load_dotenv: variables already set in the environment win)
+_ENV: Dict[str, Optional[str]] = {**dotenv_values(), **os.environ}
+
+
+def _getenv(key: str, default: Optional[str] = None) -> Optional[str]:
+    """Look up a configuration value from the merged .env/environment snapshot."""
+    value = _ENV.get(key)
+    return default if value is None else value
 
 
 class Config:
     """Application configuration."""
     
-    # Discord webhook URL (required)
-    DISCORD_WEBHOOK_URL = os.getenv("DISCORD_WEBHOOK_URL")
-    
-    # Subreddits to monitor (comma-separated, default: legodeal,legodeals)
-    # Example: "legodeal,legodeals" or "legodeal"
-    SUBREDDITS_STR = os.getenv("SUBREDDIT", os.getenv("SUBREDDITS", "legodeal,legodeals"))
+    def __init__(self):
+        """
+        Read configuration from the .env file and environment.
+        
+        Every value is resolved once here and stored as a plain attribute,
+        so hot paths (e.g. the listener poll loop) never re-read the
+        environment or re-parse the subreddit list.
+        """
+        # Discord webhook URL(s) (required, comma-separated to post to several channels)
+        self.DISCORD_WEBHOOK_URLS: Tuple[str, ...] = tuple(
+            u.strip() for u in (_getenv("DISCORD_WEBHOOK_URL") or "").split(",") if u.strip()
+        )
+        
+        # Backward compatibility: first webhook URL
+        self.DISCORD_WEBHOOK_URL = self.DISCORD_WEBHOOK_URLS[0] if self.DISCORD_WEBHOOK_URLS else None
+        
+        # Subreddits to monitor (comma-separated, default: legodeal,legodeals)
+        # Example: "legodeal,legodeals" or "legodeal"
+        self.SUBREDDITS_STR = _getenv("SUBREDDIT", _getenv("SUBREDDITS", "legodeal,legodeals"))
+        self.SUBREDDITS: Tuple[str, ...] = self._parse_subreddits(self.SUBREDDITS_STR)
+        
+        # Backward compatibility: first subreddit
+        self.SUBREDDIT = self.SUBREDDITS[0]
+        
+        # Amazon affiliate tag (optional) - e.g., "yourtag-20"
+        # If set, Amazon links will be converted to affiliate links
+        self.AMAZON_AFFILIATE_TAG = _getenv("AMAZON_AFFILIATE_TAG", "")
+        
+        # Discord role to mention for deals over 50% off (optional)
+        # Format: <@&ROLE_ID> or @LEGO (if role name is "LEGO")
+        # Leave empty to disable role mentions
+        self.LEGO_ROLE_MENTION = _getenv("LEGO_ROLE_MENTION", "<@&ROLE_ID>")
+        
+        # Polling interval in seconds (default: 10)
+        # Reddit rate limits aggressive polling. 10 seconds is safer.
+        self.POLL_INTERVAL = int(_getenv("POLL_INTERVAL", "10"))
+        
+        # Feed parser (default: fast)
+        # "fast" parses Reddit's Atom feed with the built-in XML parser and only falls back
+        # to feedparser for malformed feeds; "feedparser" always uses feedparser
+        self.FEED_PARSER = _getenv("FEED_PARSER", "fast").strip().lower()
+        
+        # Reddit RSS feed URL for every configured subreddit
+        self.RSS_URLS: Dict[str, str] = {s: self.get_rss_url(s) for s in self.SUBREDDITS}
+        
+        # Reddit RSS feed URL (for backward compatibility)
+        self.REDDIT_RSS_URL = self.RSS_URLS[self.SUBREDDIT]
     
-    @property
-    def SUBREDDITS(self) -> List[str]:
-        """Get list of subreddits to monitor."""
+    @staticmethod
+    def _parse_subreddits(subreddits_str: str) -> Tuple[str, ...]:
+        """Parse a comma-separated subreddit list."""
         # Split by comma, strip whitespace, filter empty strings
-        subreddits = [s.strip() for s in self.SUBREDDITS_STR.split(",") if s.strip()]
+        subreddits = [s.strip() for s in subreddits_str.split(",") if s.strip()]
         # Remove 'r/' prefix if present
         subreddits = [s[2:] if s.startswith("r/") else s for s in subreddits]
-        return subreddits if subreddits else ["legodeal"]
-    
-    # Backward compatibility: first subreddit
-    @property
-    def SUBREDDIT(self) -> str:
-        """Get first subreddit (for backward compatibility)."""
-        return self.SUBREDDITS[0]
-    
-    # Amazon affiliate tag (optional) - e.g., "yourtag-20"
-    # If set, Amazon links will be converted to affiliate links
-    AMAZON_AFFILIATE_TAG = os.getenv("AMAZON_AFFILIATE_TAG", "")
-    
-    # Discord role to mention for deals over 50% off (optional)
-    # Format: <@&ROLE_ID> or @LEGO (if role name is "LEGO")
-    # Leave empty to disable role mentions
-    LEGO_ROLE_MENTION = os.getenv("LEGO_ROLE_MENTION", "<@&ROLE_ID>")
-    
-    # Polling interval in seconds (default: 10)
-    # Reddit rate limits aggressive polling. 10 seconds is safer.
-    POLL_INTERVAL = int(os.getenv("POLL_INTERVAL", "10"))
-    
-    # Reddit RSS feed URL (for backward compatibility)
-    @property
-    def REDDIT_RSS_URL(self) -> str:
-        """Generate Reddit RSS feed URL for the first configured subreddit."""
-        return f"https://www.reddit.com/r/{self.SUBREDDIT}/new/.rss"
+        return tuple(subreddits) if subreddits else ("legodeal",)
     
     @staticmethod
     def get_rss_url(subreddit: str) -> str:
@@ -58,6 +81,13 @@ class Config:
         subreddit_clean = subreddit[2:] if subreddit.startswith("r/") else subreddit
         return f"https://www.reddit.com/r/{subreddit_clean}/new/.rss"
     
+    @staticmethod
+    def get_combined_rss_url(subreddits: Tuple[str, ...]) -> str:
+        """Generate one Reddit RSS feed URL covering several subreddits (r/sub1+sub2)."""
+        # Remove 'r/' prefix if present
+        subreddits_clean = [s[2:] if s.startswith("r/") else s for s in subreddits]
+        return f"https://www.reddit.com/r/{'+'.join(subreddits_clean)}/new/.rss"
+    
     def validate(self) -> None:
         """Validate that required configuration is present."""
         if not self.DISCORD_WEBHOOK_URL:
@@ -66,12 +96,15 @@ class Config:
                 "Please set it in your .env file or environment variables."
             )
         
-        if not self.DISCORD_WEBHOOK_URL.startswith("https://discord.com/api/webhooks/"):
-            raise ValueError(
-                "DISCORD_WEBHOOK_URL appears to be invalid. "
-                "It should start with 'https://discord.com/api/webhooks/'"
-            )
+        for webhook_url in self.DISCORD_WEBHOOK_URLS:
+            if not webhook_url.startswith("https://discord.com/api/webhooks/"):
+                raise ValueError(
+                    "DISCORD_WEBHOOK_URL appears to be invalid. "
+                    "Each URL should start with 'https://discord.com/api/webhooks/'"
+                )
         
         if self.POLL_INTERVAL < 1:
             raise ValueError("POLL_INTERVAL must be at least 1 second")
-
+        
+        if self.FEED_PARSER not in ("fast", "feedparser"):
+            raise ValueError("FEED_PARSER must be either 'fast' or 'feedparser'")
@@ -1,15 +1,75 @@
 """Discord webhook integration for sending notifications."""
+import json
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 import requests
-from typing import Dict, Any, Optional
+from requests.adapters import HTTPAdapter
+from typing import Dict, Any, List, Optional, Sequence
 from config import Config
 
+try:
+    import orjson
+except ImportError:  # orjson is in requirements.txt, but the stdlib encoder works too
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
 
+def _dumps(payload: Dict[str, Any]) -> bytes:
+    """Serialize a webhook payload to compact UTF-8 JSON (with orjson when installed)."""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+class RateLimiter:
+    """Thread-safe token bucket allowing `rate` calls per `per` seconds (bursts up to `rate`)."""
+    
+    def __init__(self, rate: int, per: float):
+        """
+        Initialize the rate limiter with a full bucket.
+        
+        Args:
+            rate: Calls allowed per period (also the burst size)
+            per: Period length in seconds
+        """
+        self.capacity = float(rate)
+        self.tokens = float(rate)
+        self.fill_rate = rate / per
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self) -> None:
+        """Take one token, blocking until one is available."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.fill_rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.fill_rate
+            time.sleep(wait)
+
+
 class DiscordWebhook:
     """Handles sending messages to Discord via webhook."""
     
+    # Discord limits for a single webhook message
+    MAX_EMBEDS_PER_MESSAGE = 10
+    MAX_EMBED_CHARS_PER_MESSAGE = 6000
+    
+    # Webhook send budget (~30 messages/minute); sends go out immediately until it is used up
+    RATE_LIMIT_MESSAGES = 30
+    RATE_LIMIT_PERIOD = 60.0
+    
+    # Retries after a 429 response; waits honour Retry-After, with exponential backoff
+    MAX_RETRIES = 3
+    RETRY_BASE_DELAY = 1.0
+    
     def __init__(self, webhook_url: str):
         """
         Initialize Discord webhook sender.
@@ -23,6 +83,14 @@ class DiscordWebhook:
             "Content-Type": "application/json",
             "User-Agent": "BrickSniperDiscord/1.0"
         })
+        # Sends come from a single sender thread, so a small pool to discord.com is enough
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4, pool_block=False))
+        
+        # Prepare the request (URL, merged session headers) once; send() only swaps the body
+        self._request_template = self.session.prepare_request(requests.Request("POST", webhook_url))
+        
+        # Paces sends to the webhook's budget instead of fixed sleeps between posts
+        self.rate_limiter = RateLimiter(self.RATE_LIMIT_MESSAGES, self.RATE_LIMIT_PERIOD)
     
     def send(self, payload: Dict[str, Any]) -> bool:
         """
@@ -30,16 +98,28 @@ class DiscordWebhook:
         
         Args:
             payload: Discord webhook payload dictionary
-            
+        
         Returns:
             True if successful, False otherwise
         """
         try:
-            response = self.session.post(
-                self.webhook_url,
-                json=payload,
-                timeout=10
-            )
+            # Serialize once for every attempt; the template already carries Content-Type: application/json
+            body = _dumps(payload)
+            
+            for attempt in range(self.MAX_RETRIES + 1):
+                self.rate_limiter.acquire()
+                request = self._request_template.copy()
+                request.prepare_body(data=body, files=None)
+                response = self.session.send(request, timeout=10)
+                
+                if response.status_code != 429 or attempt == self.MAX_RETRIES:
+                    break
+                
+                # Rate limited: wait as long as Discord asks, then retry
+                delay = self._retry_delay(response, attempt)
+                logger.warning(f"Discord rate limit hit. Retrying in {delay:.1f} seconds...")
+                time.sleep(delay)
+            
             response.raise_for_status()
             logger.debug(f"Successfully sent message to Discord: {response.status_code}")
             return True
@@ -65,9 +145,159 @@ class DiscordWebhook:
         
         Args:
             payload: Discord webhook payload dictionary
-            
+        
         Returns:
             True if successful, False otherwise
         """
         return self.send(payload)
+    
+    def send_batch(self, payloads: List[Dict[str, Any]]) -> List[bool]:
+        """
+        Send several post notifications using as few webhook requests as possible.
+        
+        Consecutive payloads with the same content are merged into one message
+        of up to MAX_EMBEDS_PER_MESSAGE embeds (and MAX_EMBED_CHARS_PER_MESSAGE
+        characters), so ordering and role mentions are preserved.
+        
+        Args:
+            payloads: Discord webhook payload dictionaries, in send order
+        
+        Returns:
+            One success flag per payload, in the same order
+        """
+        results: List[bool] = []
+        batch: List[Dict[str, Any]] = []
+        batch_embeds = 0
+        batch_chars = 0
+        
+        for payload in payloads:
+            embeds = payload.get("embeds", [])
+            chars = sum(self._embed_length(embed) for embed in embeds)
+            
+            # Flush the current batch if this payload cannot join it
+            if batch and (
+                payload.get("content") != batch[0].get("content")
+                or batch_embeds + len(embeds) > self.MAX_EMBEDS_PER_MESSAGE
+                or batch_chars + chars > self.MAX_EMBED_CHARS_PER_MESSAGE
+            ):
+                results.extend(self._send_merged(batch))
+                batch = []
+                batch_embeds = 0
+                batch_chars = 0
+            
+            batch.append(payload)
+            batch_embeds += len(embeds)
+            batch_chars += chars
+        
+        if batch:
+            results.extend(self._send_merged(batch))
+        
+        return results
+    
+    def _send_merged(self, payloads: List[Dict[str, Any]]) -> List[bool]:
+        """Send payloads that share the same content as a single message."""
+        if len(payloads) == 1:
+            return [self.send(payloads[0])]
+        
+        merged = {
+            "content": payloads[0].get("content"),
+            "embeds": [embed for payload in payloads for embed in payload.get("embeds", [])]
+        }
+        success = self.send(merged)
+        return [success] * len(payloads)
+    
+    def _retry_delay(self, response: requests.Response, attempt: int) -> float:
+        """
+        Work out how long to wait before retrying a rate-limited send.
+        
+        Args:
+            response: 429 response from Discord
+            attempt: Zero-based attempt number of the send that was rejected
+        
+        Returns:
+            Seconds to wait (Retry-After, but at least the exponential backoff delay)
+        """
+        backoff = self.RETRY_BASE_DELAY * (2 ** attempt)
+        try:
+            retry_after = float(response.headers.get("Retry-After", 0))
+        except ValueError:
+            retry_after = 0.0
+        return max(retry_after, backoff)
+    
+    @staticmethod
+    def _embed_length(embed: Dict[str, Any]) -> int:
+        """Count the characters Discord counts towards the per-message embed limit."""
+        length = len(embed.get("title") or "") + len(embed.get("description") or "")
+        length += len((embed.get("footer") or {}).get("text") or "")
+        length += len((embed.get("author") or {}).get("name") or "")
+        for field in embed.get("fields") or []:
+            length += len(field.get("name") or "") + len(field.get("value") or "")
+        return length
+
 
+class DiscordWebhookGroup:
+    """Sends every message to one or more Discord webhooks, concurrently."""
+    
+    def __init__(self, webhook_urls: Sequence[str]):
+        """
+        Initialize one rate-limited DiscordWebhook per URL.
+        
+        Args:
+            webhook_urls: Discord webhook URLs (at least one)
+        """
+        if not webhook_urls:
+            raise ValueError("At least one Discord webhook URL is required")
+        
+        # Discord rate limits each webhook separately, so every webhook keeps its own
+        # session and token bucket and they are all sent to at the same time
+        self.webhooks = [DiscordWebhook(webhook_url) for webhook_url in webhook_urls]
+        self._executor = (
+            ThreadPoolExecutor(max_workers=len(self.webhooks), thread_name_prefix="DiscordWebhook")
+            if len(self.webhooks) > 1 else None
+        )
+    
+    def send(self, payload: Dict[str, Any]) -> bool:
+        """
+        Send a message to every webhook.
+        
+        Args:
+            payload: Discord webhook payload dictionary
+            
+        Returns:
+            True if every webhook accepted the message, False otherwise
+        """
+        if self._executor is None:
+            return self.webhooks[0].send(payload)
+        
+        futures = [self._executor.submit(webhook.send, payload) for webhook in self.webhooks]
+        return all([future.result() for future in futures])
+    
+    def send_post(self, payload: Dict[str, Any]) -> bool:
+        """
+        Send a post notification to every webhook.
+        Alias for send() for clarity.
+        
+        Args:
+            payload: Discord webhook payload dictionary
+            
+        Returns:
+            True if every webhook accepted the message, False otherwise
+        """
+        return self.send(payload)
+    
+    def send_batch(self, payloads: List[Dict[str, Any]]) -> List[bool]:
+        """
+        Send several post notifications to every webhook (see DiscordWebhook.send_batch).
+        
+        Args:
+            payloads: Discord webhook payload dictionaries, in send order
+            
+        Returns:
+            One success flag per payload (True only if every webhook accepted it)
+        """
+        if self._executor is None:
+            return self.webhooks[0].send_batch(payloads)
+        
+        futures = [self._executor.submit(webhook.send_batch, payloads) for webhook in self.webhooks]
+        results = [future.result() for future in futures]
+        return [all(flags) for flags in zip(*results)]
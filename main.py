@@ -1,13 +1,16 @@
 """Main entry point for Reddit Discord notifier."""
+import heapq
 import logging
+import queue
 import signal
 import sys
 import threading
-from typing import Optional, List
+import time
+from typing import Optional, List, Tuple, Dict, Any
 from config import Config
 from reddit_listener import RedditListener
 from post_parser import PostParser
-from discord_webhook import DiscordWebhook
+from discord_webhook import DiscordWebhook, DiscordWebhookGroup
 
 
 # Configure logging
@@ -22,15 +25,28 @@ logger = logging.getLogger(__name__)
 class RedditDiscordNotifier:
     """Main application class."""
     
+    # Seconds the sender waits for more posts to join a batch before sending it
+    BATCH_WINDOW = 0.5
+    
     def __init__(self):
         """Initialize the notifier."""
         self.config = Config()
         self.config.validate()
         
-        self.discord = DiscordWebhook(self.config.DISCORD_WEBHOOK_URL)
+        self.discord = DiscordWebhookGroup(self.config.DISCORD_WEBHOOK_URLS)
         self.parser = PostParser()
         self.listeners: List[RedditListener] = []
-        self.threads: List[threading.Thread] = []
+        # All listeners are polled from one thread, so they share one pooled session to Reddit
+        self.reddit_session = RedditListener.create_session(pool_maxsize=2)
+        
+        # Outgoing notifications: (payload, post_id, subreddit), or None to stop the sender.
+        # A single sender thread drains this so listeners never block on Discord and
+        # every send shares the webhook's pooled keep-alive connection.
+        self.send_queue: "queue.Queue[Optional[Tuple[Dict[str, Any], str, str]]]" = queue.Queue()
+        self.sender_thread: Optional[threading.Thread] = None
+        
+        # Set on shutdown; the poll loop waits on it instead of sleeping so it wakes immediately
+        self._shutdown = threading.Event()
         
         # Setup signal handlers for graceful shutdown
         signal.signal(signal.SIGINT, self._signal_handler)
@@ -39,9 +55,13 @@ class RedditDiscordNotifier:
     def _signal_handler(self, signum, frame):
         """Handle shutdown signals."""
         logger.info(f"Received signal {signum}, shutting down gracefully...")
+        self._stop()
+    
+    def _stop(self):
+        """Stop polling; run() then lets the sender flush queued notifications."""
+        self._shutdown.set()
         for listener in self.listeners:
             listener.stop()
-        sys.exit(0)
     
     def _on_new_post(self, post, subreddit: str):
         """
@@ -61,26 +81,71 @@ class RedditDiscordNotifier:
             subreddit=subreddit
         )
         
-        # Send to Discord
-        success = self.discord.send_post(payload)
-        
-        if success:
-            logger.info(f"Successfully sent notification for post: {post.post_id} from r/{subreddit}")
-        else:
-            logger.error(f"Failed to send notification for post: {post.post_id} from r/{subreddit}")
+        # Hand off to the sender thread
+        self.send_queue.put((payload, post.post_id, subreddit))
+    
+    def _sender_loop(self):
+        """Thread function that sends queued notifications to Discord in order."""
+        stopping = False
+        while not stopping:
+            item = self.send_queue.get()
+            if item is None:
+                break
+            
+            # Coalesce a burst of posts into one batch (one webhook request per 10 embeds)
+            batch = [item]
+            while len(batch) < DiscordWebhook.MAX_EMBEDS_PER_MESSAGE:
+                try:
+                    item = self.send_queue.get(timeout=self.BATCH_WINDOW)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            
+            results = self.discord.send_batch([payload for payload, _, _ in batch])
+            
+            for (_, post_id, subreddit), success in zip(batch, results):
+                if success:
+                    logger.info(f"Successfully sent notification for post: {post_id} from r/{subreddit}")
+                else:
+                    logger.error(f"Failed to send notification for post: {post_id} from r/{subreddit}")
     
-    def _listener_thread(self, subreddit: str):
-        """Thread function to run a listener for a specific subreddit."""
+    def _create_listener(self, subreddit: str) -> RedditListener:
+        """Create a listener for a specific subreddit."""
         def callback(post):
             self._on_new_post(post, subreddit)
         
-        listener = RedditListener(subreddit, self.config, callback)
-        self.listeners.append(listener)
+        return RedditListener(subreddit, self.config, callback, session=self.reddit_session)
+    
+    def _poll_loop(self):
+        """
+        Drive every listener from the current thread.
         
-        try:
-            listener.start()
-        except Exception as e:
-            logger.error(f"Fatal error in listener for r/{subreddit}: {e}", exc_info=True)
+        Each listener keeps its own cadence (poll interval, backoff, Retry-After);
+        a heap of due times decides which one polls next.
+        """
+        # (due time, index, listener) - the index keeps heap ordering stable
+        schedule = [(time.monotonic(), i, listener) for i, listener in enumerate(self.listeners)]
+        heapq.heapify(schedule)
+        
+        while schedule and not self._shutdown.is_set():
+            due, i, listener = heapq.heappop(schedule)
+            wait = due - time.monotonic()
+            if wait > 0 and self._shutdown.wait(wait):
+                break
+            
+            if not listener.running:
+                continue
+            
+            try:
+                delay = listener.poll()
+            except Exception as e:
+                logger.error(f"Fatal error in listener for r/{listener.subreddit}: {e}", exc_info=True)
+                continue
+            
+            heapq.heappush(schedule, (time.monotonic() + delay, i, listener))
     
     def run(self):
         """Run the notifier."""
@@ -91,27 +156,30 @@ class RedditDiscordNotifier:
         subreddits = self.config.SUBREDDITS
         logger.info(f"Monitoring {len(subreddits)} subreddit(s): {', '.join(f'r/{s}' for s in subreddits)}")
         
-        # Create and start a listener thread for each subreddit
+        # Start the Discord sender before any listener can produce posts
+        self.sender_thread = threading.Thread(
+            target=self._sender_loop,
+            daemon=False,
+            name="DiscordSender"
+        )
+        self.sender_thread.start()
+        
+        # One listener per subreddit, all polled from this thread
         for subreddit in subreddits:
-            thread = threading.Thread(
-                target=self._listener_thread,
-                args=(subreddit,),
-                daemon=False,
-                name=f"Listener-{subreddit}"
-            )
-            thread.start()
-            self.threads.append(thread)
-            logger.info(f"Started listener thread for r/{subreddit}")
+            self.listeners.append(self._create_listener(subreddit))
+            logger.info(f"Created listener for r/{subreddit}")
         
-        # Wait for all threads to complete (they run indefinitely)
+        # Poll until shutdown is requested (listeners run indefinitely)
         try:
-            for thread in self.threads:
-                thread.join()
+            self._poll_loop()
         except KeyboardInterrupt:
             logger.info("Interrupted by user, shutting down...")
-            for listener in self.listeners:
-                listener.stop()
-            sys.exit(0)
+            self._stop()
+        finally:
+            # Let the sender flush whatever is already queued, then exit
+            self.send_queue.put(None)
+            self.sender_thread.join()
+            self.reddit_session.close()
 
 
 def main():
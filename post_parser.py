@@ -1,14 +1,18 @@
 """Parse Reddit posts and extract relevant information."""
 import re
 import html
+import io
+import functools
+import itertools
 from html.parser import HTMLParser
-from urllib.parse import urlparse, urlencode, parse_qs, urlunparse
-from typing import Optional, Dict, Any, List, Tuple
+from xml.etree import ElementTree
+from urllib.parse import quote_plus
+from typing import Optional, Dict, Any, Iterable, Iterator, List, Tuple
 from dataclasses import dataclass
 from datetime import datetime
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ParsedPost:
     """Represents a parsed Reddit post."""
     post_id: str
@@ -87,18 +91,87 @@ class HTMLTextExtractor(HTMLParser):
 class PostParser:
     """Parser for Reddit post data."""
     
-    # Regex pattern to match URLs in text
+    # Regex pattern to match URLs in text. A single character class plus a lookbehind
+    # for trailing punctuation, so the engine never backtracks between overlapping classes.
     URL_PATTERN = re.compile(
-        r'https?://[^\s<>"{}|\\^`\[\]]+[^\s<>"{}|\\^`\[\].,;:!?]',
+        r'https?://[^\s<>"{}|\\^`\[\]]+(?<![.,;:!?])',
         re.IGNORECASE
     )
     
+    # HTML stripping for the regex fallback in clean_html_text: comments, then script
+    # and style blocks are dropped, then any remaining tag becomes a space. The passes
+    # stay separate and in this order, since a stray '<' or a block nested in another
+    # would otherwise match differently
+    FALLBACK_BLOCK_PATTERNS = (
+        re.compile(r'<!--.*?-->', re.DOTALL),
+        re.compile(r'<script[^>]*>.*?</script>', re.DOTALL | re.IGNORECASE),
+        re.compile(r'<style[^>]*>.*?</style>', re.DOTALL | re.IGNORECASE)
+    )
+    FALLBACK_TAG_PATTERN = re.compile(r'<[^>]+>')
+    
+    # Whitespace that normalize_whitespace would change: a run of two, anything but a
+    # plain space, or whitespace at either end
+    UNNORMALIZED_WHITESPACE_PATTERN = re.compile(r'\s\s|[^\S ]|^\s|\s$')
+    
+    # Any "&" that does not start one of the five entities _fast_unescape handles itself
+    UNCOMMON_ENTITY_PATTERN = re.compile(r'&(?!(?:amp|lt|gt|quot|#39);)')
+    
+    # Reddit internal links, matched anywhere in the URL without lowercasing it
+    REDDIT_LINK_MATCHER = re.compile(r'reddit\.com', re.IGNORECASE)
+    
+    # An existing "tag" query parameter (with its leading separator, if any)
+    TAG_PARAM_PATTERN = re.compile(r'(^|&)tag=[^&]*')
+    
+    # Discount patterns for extract_discount_percentage
+    DISCOUNT_OFF_PATTERN = re.compile(r'(\d+)%\s*off', re.IGNORECASE)
+    PERCENT_PATTERN = re.compile(r'(\d+)%')
+    
     # Image file extensions
     IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.webp', '.bmp', '.svg'}
     
     # Reddit image hosting domains
     REDDIT_IMAGE_DOMAINS = {'i.redd.it', 'preview.redd.it', 'i.imgur.com', 'b.thumbs.redditmedia.com', 'a.thumbs.redditmedia.com'}
     
+    # XML namespaces used by Reddit's Atom feeds
+    ATOM_NS = "{http://www.w3.org/2005/Atom}"
+    MEDIA_NS = "{http://search.yahoo.com/mrss/}"
+    
+    # Embed description length; Discord's limit is 4096, but we'll keep it shorter
+    MAX_DESCRIPTION_LENGTH = 2000
+    
+    # Static part of every Discord embed; format_for_discord copies it and fills in the rest
+    EMBED_TEMPLATE = {
+        "color": 16711680,  # Red color
+        "timestamp": None  # Will be set by Discord if available
+    }
+    
+    # Amazon storefront domains
+    AMAZON_DOMAINS = ('amazon.com', 'amazon.co.uk', 'amazon.ca', 'amazon.de',
+                      'amazon.fr', 'amazon.it', 'amazon.es', 'amazon.co.jp',
+                      'amazon.in', 'amazon.com.au', 'amazon.com.mx', 'amazon.com.br')
+    
+    # Matches a host that is an Amazon domain or a subdomain of one (e.g. www.amazon.co.uk)
+    AMAZON_HOST_MATCHER = re.compile(
+        r'(?:[^.]+\.)*(?:' + '|'.join(re.escape(domain) for domain in AMAZON_DOMAINS) + r')'
+    )
+    
+    # Single matcher for every image domain, built once at class load
+    # so is_image_url scans each URL in one pass instead of one substring search per domain
+    IMAGE_DOMAIN_MATCHER = re.compile(
+        '|'.join(re.escape(domain) for domain in sorted(REDDIT_IMAGE_DOMAINS)),
+        re.IGNORECASE
+    )
+    
+    # Matches when the URL path (before any query string or fragment) ends with an image extension
+    IMAGE_EXTENSION_MATCHER = re.compile(
+        r'[^?#]*(?:' + '|'.join(re.escape(ext) for ext in sorted(IMAGE_EXTENSIONS)) + r')(?:[?#]|\Z)',
+        re.IGNORECASE
+    )
+    
+    # Hosts (after any "www.") that never serve images; URLs on them skip the image checks.
+    # Their product images live on separate CDN hosts (e.g. m.media-amazon.com).
+    NON_IMAGE_HOST_PREFIXES = ('amazon.', 'reddit.com', 'target.com', 'walmart.com')
+    
     @staticmethod
     def is_amazon_url(url: str) -> bool:
         """
@@ -113,17 +186,8 @@ class PostParser:
         if not url:
             return False
         
-        url_lower = url.lower()
-        # Check for various Amazon domains
-        amazon_domains = ['amazon.com', 'amazon.co.uk', 'amazon.ca', 'amazon.de', 
-                          'amazon.fr', 'amazon.it', 'amazon.es', 'amazon.co.jp',
-                          'amazon.in', 'amazon.com.au', 'amazon.com.mx', 'amazon.com.br']
-        
-        for domain in amazon_domains:
-            if domain in url_lower:
-                return True
-        
-        return False
+        # Match the host only, so e.g. "example.com/?u=amazon.com" is not treated as Amazon
+        return PostParser.AMAZON_HOST_MATCHER.fullmatch(_url_host(url)) is not None
     
     @staticmethod
     def convert_to_affiliate_link(url: str, affiliate_tag: str) -> str:
@@ -143,22 +207,65 @@ class PostParser:
         if not PostParser.is_amazon_url(url):
             return url
         
-        try:
-            parsed = urlparse(url)
-            query_params = parse_qs(parsed.query)
-            
-            # Add or replace the tag parameter
-            query_params['tag'] = [affiliate_tag]
+        # Work on the raw string: only the query part changes, the fragment is kept as-is
+        base, hash_mark, fragment = url.partition('#')
+        tag_param = 'tag=' + quote_plus(affiliate_tag)
+        
+        query_start = base.find('?')
+        if query_start == -1:
+            base = f"{base}?{tag_param}"
+        else:
+            query = base[query_start + 1:]
+            match = PostParser.TAG_PARAM_PATTERN.search(query) if 'tag=' in query else None
+            if match:
+                # Replace the first tag parameter in place and drop any repeats
+                rest = PostParser.TAG_PARAM_PATTERN.sub('', query[match.end():])
+                query = query[:match.start()] + match.group(1) + tag_param + rest
+            elif query:
+                query = f"{query}&{tag_param}"
+            else:
+                query = tag_param
+            base = f"{base[:query_start]}?{query}"
+        
+        return base + hash_mark + fragment
+    
+    @staticmethod
+    def _fast_unescape(text: str) -> str:
+        """
+        Decode HTML entities, like html.unescape.
+        
+        Reddit feeds almost only use &amp;, &lt;, &gt;, &quot; and &#39;, which are
+        decoded with plain replaces; anything else goes through html.unescape.
+        
+        Args:
+            text: Text that may contain HTML entities
             
-            # Rebuild the URL
-            new_query = urlencode(query_params, doseq=True)
-            new_parsed = parsed._replace(query=new_query)
-            affiliate_url = urlunparse(new_parsed)
+        Returns:
+            Text with entities decoded
+        """
+        if '&' not in text:
+            return text
+        if PostParser.UNCOMMON_ENTITY_PATTERN.search(text):
+            return html.unescape(text)
+        # &amp; goes last so e.g. "&amp;lt;" becomes "&lt;", not "<" (single decoding pass)
+        return (text.replace('&lt;', '<').replace('&gt;', '>').replace('&quot;', '"')
+                .replace('&#39;', "'").replace('&amp;', '&'))
+    
+    @staticmethod
+    def normalize_whitespace(text: str) -> str:
+        """
+        Collapse whitespace runs to single spaces and strip both ends.
+        
+        Args:
+            text: Text to normalize
             
-            return affiliate_url
-        except Exception:
-            # If URL parsing fails, return original URL
-            return url
+        Returns:
+            Normalized text (the same string if it was already normalized)
+        """
+        # Most extracted post text is already clean, so avoid the split/join copy
+        if not PostParser.UNNORMALIZED_WHITESPACE_PATTERN.search(text):
+            return text
+        return ' '.join(text.split())
     
     @staticmethod
     def clean_html_text(html_text: str) -> Tuple[str, List[str], List[str]]:
@@ -175,33 +282,30 @@ class PostParser:
             return "", [], []
         
         # Decode HTML entities
-        text = html.unescape(html_text)
+        text = PostParser._fast_unescape(html_text)
+        
+        # Fast path: with no markup left there is nothing for the (pure-Python) HTML parser
+        # to find, so only its character-reference decoding of the text needs to be applied
+        if '<' not in text:
+            text = PostParser._fast_unescape(text)
+            return PostParser.normalize_whitespace(text), [], []
         
         # Extract text, images, and links using HTML parser
         extractor = HTMLTextExtractor()
         extractor.feed(text)
         
-        cleaned_text = extractor.get_text()
+        # Clean up whitespace (an empty result means the parser found no real text)
+        cleaned_text = PostParser.normalize_whitespace(extractor.get_text())
         image_urls = extractor.get_image_urls()
         link_urls = extractor.get_link_urls()
         
         # If HTML parser didn't extract text well, fall back to regex stripping
-        if not cleaned_text.strip():
-            # Remove HTML comments
-            text = re.sub(r'<!--.*?-->', '', text, flags=re.DOTALL)
-            # Remove script and style tags
-            text = re.sub(r'<script[^>]*>.*?</script>', '', text, flags=re.DOTALL | re.IGNORECASE)
-            text = re.sub(r'<style[^>]*>.*?</style>', '', text, flags=re.DOTALL | re.IGNORECASE)
-            # Remove all HTML tags
-            text = re.sub(r'<[^>]+>', ' ', text)
-            # Decode HTML entities again
-            text = html.unescape(text)
-            # Clean up whitespace
-            text = ' '.join(text.split())
-            cleaned_text = text
-        
-        # Clean up whitespace
-        cleaned_text = ' '.join(cleaned_text.split())
+        # (entities were already decoded above)
+        if not cleaned_text:
+            for pattern in PostParser.FALLBACK_BLOCK_PATTERNS:
+                text = pattern.sub('', text)
+            text = PostParser.FALLBACK_TAG_PATTERN.sub(' ', text)
+            cleaned_text = PostParser.normalize_whitespace(text)
         
         return cleaned_text, image_urls, link_urls
     
@@ -236,19 +340,42 @@ class PostParser:
         if not url:
             return False
         
-        url_lower = url.lower()
+        return _is_image_url(url)
+    
+    @staticmethod
+    def _scan_urls(text: str) -> Iterator[Tuple[str, bool]]:
+        """
+        Scan text for URLs in a single pass.
         
-        # Check if it's a Reddit image domain
-        for domain in PostParser.REDDIT_IMAGE_DOMAINS:
-            if domain in url_lower:
-                return True
+        Args:
+            text: Text to search for URLs
+            
+        Yields:
+            Tuples of (url, is_image) in the order the URLs appear
+        """
+        if not text:
+            return
         
-        # Check file extension
-        for ext in PostParser.IMAGE_EXTENSIONS:
-            if ext in url_lower:
-                return True
+        for match in PostParser.URL_PATTERN.finditer(text):
+            url = match.group(0)
+            yield url, PostParser.is_image_url(url)
+    
+    @staticmethod
+    def _first_external_url(urls: Iterable[str]) -> Optional[str]:
+        """
+        Return the first URL that is neither an image nor a Reddit link.
         
-        return False
+        Args:
+            urls: Candidate URLs in priority order (consumed lazily)
+            
+        Returns:
+            First external link (e.g. Amazon), or None if there is none
+        """
+        for url in urls:
+            # Skip image URLs and Reddit internal links (we want external links like Amazon)
+            if not PostParser.is_image_url(url) and not PostParser.REDDIT_LINK_MATCHER.search(url):
+                return url
+        return None
     
     @staticmethod
     def extract_image_urls(text: str) -> List[str]:
@@ -264,9 +391,8 @@ class PostParser:
         if not text:
             return []
         
-        urls = PostParser.URL_PATTERN.findall(text)
-        image_urls = [url for url in urls if PostParser.is_image_url(url)]
-        return image_urls
+        # filter() runs the memoized check straight from C; findall never yields empty URLs
+        return list(filter(_is_image_url, PostParser.URL_PATTERN.findall(text)))
     
     @staticmethod
     def extract_discount_percentage(title: str) -> Optional[int]:
@@ -285,30 +411,127 @@ class PostParser:
         Returns:
             Discount percentage as integer (0-100), or None if not found
         """
-        if not title:
+        # Every pattern below needs a '%', so most titles are rejected by one substring check
+        if not title or '%' not in title:
             return None
         
         # Pattern 1: "XX% off" or "XX% Off" (case insensitive)
-        match = re.search(r'(\d+)%\s*off', title, re.IGNORECASE)
+        match = PostParser.DISCOUNT_OFF_PATTERN.search(title)
         if match:
             return int(match.group(1))
         
         # Pattern 2: "XX%" at end of title or before certain words
-        match = re.search(r'(\d+)%', title)
+        match = PostParser.PERCENT_PATTERN.search(title)
         if match:
             # Check if it's likely a discount percentage
             # Look for context like price/discount patterns
             percent = int(match.group(1))
-            # If it's between 1-100 and appears in discount context, return it
+            # If it's between 1-100 it is treated as a discount
+            # (patterns like "$83/17%", "61.39/53%", "XX%"; the match itself contains '%')
             if 1 <= percent <= 100:
-                # Check if it's in a discount-like context
-                # Patterns like: "$83/17%", "61.39/53%", "XX%", etc.
-                context = title.lower()
-                if any(keyword in context for keyword in ['off', '%', '/']):
-                    return percent
+                return percent
         
         return None
     
+    @staticmethod
+    def iter_entries_from_xml(xml_bytes: bytes) -> Iterator[Dict[str, Any]]:
+        """
+        Parse a Reddit Atom feed into entry dictionaries.
+        
+        Uses the C-accelerated ElementTree parser and yields dicts with the same
+        keys feedparser provides for the fields parse_feed_entry reads
+        (link, title, summary, content, media_thumbnail, media_content, published).
+        The document is parsed incrementally, so a caller that stops after the first
+        few entries (e.g. via itertools.islice) never parses the rest of the feed.
+        
+        Args:
+            xml_bytes: Raw feed document
+            
+        Yields:
+            Entry dictionaries, in feed order
+            
+        Raises:
+            xml.etree.ElementTree.ParseError: If the document is not well-formed XML
+                (raised while iterating, possibly after earlier entries were yielded)
+        """
+        atom = PostParser.ATOM_NS
+        media = PostParser.MEDIA_NS
+        entry_tag = f"{atom}entry"
+        
+        for _, element in ElementTree.iterparse(io.BytesIO(xml_bytes), events=("end",)):
+            if element.tag != entry_tag:
+                continue
+            
+            entry: Dict[str, Any] = {}
+            
+            # Post permalink is the alternate link (rel defaults to alternate in Atom)
+            for link_element in element.iter(f"{atom}link"):
+                if link_element.get("rel", "alternate") == "alternate":
+                    entry["link"] = link_element.get("href", "")
+                    break
+            
+            entry["title"] = element.findtext(f"{atom}title", "")
+            
+            # Like feedparser, fall back to the content body when there is no summary
+            content = element.findtext(f"{atom}content")
+            summary = element.findtext(f"{atom}summary")
+            if content is not None:
+                entry["content"] = [{"value": content}]
+            if summary is not None or content is not None:
+                entry["summary"] = summary if summary is not None else content
+            
+            thumbnails = [{"url": t.get("url")} for t in element.iter(f"{media}thumbnail") if t.get("url")]
+            if thumbnails:
+                entry["media_thumbnail"] = thumbnails
+            
+            media_content = [{"url": m.get("url")} for m in element.iter(f"{media}content") if m.get("url")]
+            if media_content:
+                entry["media_content"] = media_content
+            
+            published = element.findtext(f"{atom}published") or element.findtext(f"{atom}updated")
+            if published:
+                entry["published"] = published
+            
+            # The entry is fully copied into the dict; drop its subtree to keep memory flat
+            element.clear()
+            yield entry
+    
+    @staticmethod
+    def extract_post_id(link: str) -> Optional[str]:
+        """
+        Extract the Reddit post ID from a post permalink.
+        
+        Args:
+            link: Post URL (format: https://reddit.com/r/subreddit/comments/ID/title/)
+            
+        Returns:
+            Post ID, or None if the link is not a post permalink
+        """
+        _, sep, rest = link.partition("/comments/")
+        if not sep:
+            return None
+        
+        post_id, _, _ = rest.partition("/")
+        return post_id or None
+    
+    @staticmethod
+    def extract_subreddit(link: str) -> Optional[str]:
+        """
+        Extract the subreddit name from a Reddit permalink.
+        
+        Args:
+            link: Post URL (format: https://reddit.com/r/subreddit/comments/ID/title/)
+            
+        Returns:
+            Subreddit name (without r/ prefix), or None if the link has none
+        """
+        _, sep, rest = link.partition("/r/")
+        if not sep:
+            return None
+        
+        subreddit, _, _ = rest.partition("/")
+        return subreddit or None
+    
     @staticmethod
     def parse_feed_entry(entry: Dict[str, Any], affiliate_tag: Optional[str] = None) -> Optional[ParsedPost]:
         """
@@ -323,12 +546,10 @@ class PostParser:
         try:
             # Extract post ID from link (format: https://reddit.com/r/subreddit/comments/ID/title/)
             link = entry.get("link", "")
-            post_id_match = re.search(r'/comments/([^/]+)/', link)
-            if not post_id_match:
+            post_id = PostParser.extract_post_id(link)
+            if not post_id:
                 return None
             
-            post_id = post_id_match.group(1)
-            
             # Extract title
             title = entry.get("title", "").strip()
             if not title:
@@ -340,46 +561,20 @@ class PostParser:
             # Extract selftext (post body) - may contain HTML
             # Feedparser may put this in different fields
             raw_selftext = ""
-            if "summary" in entry:
-                raw_selftext = entry["summary"].strip()
-            elif "content" in entry and len(entry["content"]) > 0:
-                raw_selftext = entry["content"][0].get("value", "").strip()
+            if (summary := entry.get("summary")):
+                raw_selftext = summary.strip()
+            elif (content := entry.get("content")):
+                raw_selftext = content[0].get("value", "").strip()
             
             # Clean HTML and extract images and links
             selftext, html_image_urls, html_link_urls = PostParser.clean_html_text(raw_selftext)
             
-            # Extract first URL - prioritize links from HTML anchor tags, then fall back to text extraction
-            detected_link = None
-            
-            # First, check for links extracted from HTML anchor tags (most reliable)
-            if html_link_urls:
-                # Filter out image URLs and Reddit links (we want external links like Amazon)
-                for link_url in html_link_urls:
-                    # Skip if it's an image URL
-                    if not PostParser.is_image_url(link_url):
-                        # Skip Reddit internal links (we want external links like Amazon)
-                        if 'reddit.com' not in link_url.lower():
-                            detected_link = link_url
-                            break
-            
-            # If no link found from HTML anchor tags, try extracting from raw HTML text
-            if not detected_link:
-                raw_urls = PostParser.URL_PATTERN.findall(raw_selftext)
-                for url in raw_urls:
-                    # Skip if it's an image URL
-                    if not PostParser.is_image_url(url):
-                        # Skip Reddit internal links
-                        if 'reddit.com' not in url.lower():
-                            detected_link = url
-                            break
-            
-            # Last resort: extract from cleaned text
-            if not detected_link:
-                detected_link = PostParser.extract_first_url(selftext)
-            
-            # Convert Amazon links to affiliate links if affiliate tag is provided
-            if detected_link and affiliate_tag and PostParser.is_amazon_url(detected_link):
-                detected_link = PostParser.convert_to_affiliate_link(detected_link, affiliate_tag)
+            # Extract first URL - prioritize links from HTML anchor tags (most reliable),
+            # then URLs in the raw HTML text; the raw text is only scanned if no anchor qualifies
+            detected_link = PostParser._first_external_url(itertools.chain(
+                html_link_urls,
+                (match.group(0) for match in PostParser.URL_PATTERN.finditer(raw_selftext))
+            ))
             
             # Extract image URL (priority order)
             image_url = None
@@ -392,14 +587,14 @@ class PostParser:
                         break
             
             # 2. Check for media_thumbnail in feed entry (Reddit RSS often includes this)
-            if not image_url and "media_thumbnail" in entry and len(entry["media_thumbnail"]) > 0:
-                thumbnail_url = entry["media_thumbnail"][0].get("url", "")
+            if not image_url and (media_thumbnail := entry.get("media_thumbnail")):
+                thumbnail_url = media_thumbnail[0].get("url", "")
                 if thumbnail_url and PostParser.is_image_url(thumbnail_url):
                     image_url = thumbnail_url
             
             # 3. Check for media_content (higher quality images)
-            if not image_url and "media_content" in entry:
-                for media in entry["media_content"]:
+            if not image_url and (media_content := entry.get("media_content")):
+                for media in media_content:
                     media_url = media.get("url", "")
                     if media_url and PostParser.is_image_url(media_url):
                         image_url = media_url
@@ -409,25 +604,46 @@ class PostParser:
             if not image_url and PostParser.is_image_url(link):
                 image_url = link
             
-            # 5. Extract image URLs from cleaned selftext as last resort
+            # Scan the cleaned text once for both the fallback link and the fallback image.
+            # Only the pieces that are still missing are looked for.
+            need_url = not detected_link
+            need_image = not image_url
+            first_url = None
+            first_image_url = None
+            if need_url or need_image:
+                for url, is_image in PostParser._scan_urls(selftext):
+                    if need_url and first_url is None:
+                        first_url = url
+                    if need_image and first_image_url is None and is_image:
+                        first_image_url = url
+                    if (not need_url or first_url) and (not need_image or first_image_url):
+                        break
+            
+            # Last resort for the link: first URL in the cleaned text
+            if not detected_link:
+                detected_link = first_url
+            
+            # 5. Last resort for the image: first image URL in the cleaned text
             if not image_url:
-                image_urls = PostParser.extract_image_urls(selftext)
-                if image_urls:
-                    image_url = image_urls[0]  # Use first image found
+                image_url = first_image_url
+            
+            # Convert Amazon links to affiliate links if affiliate tag is provided
+            if detected_link and affiliate_tag and PostParser.is_amazon_url(detected_link):
+                detected_link = PostParser.convert_to_affiliate_link(detected_link, affiliate_tag)
             
             # Extract published timestamp
             published_time = None
-            if "published_parsed" in entry and entry["published_parsed"]:
+            if (published_parsed := entry.get("published_parsed")):
                 # published_parsed is a time.struct_time tuple
                 try:
-                    published_time = datetime(*entry["published_parsed"][:6])
+                    published_time = datetime(*published_parsed[:6])
                 except (ValueError, TypeError):
                     pass
-            elif "published" in entry:
+            elif (published := entry.get("published")):
                 # Fallback to parsing the published string
                 try:
                     # Feedparser should have parsed this, but try manual parsing if needed
-                    published_time = datetime.fromisoformat(entry["published"].replace("Z", "+00:00"))
+                    published_time = datetime.fromisoformat(published.replace("Z", "+00:00"))
                 except (ValueError, AttributeError):
                     pass
             
@@ -461,14 +677,14 @@ class PostParser:
         """
         subreddit_display = f"r/{subreddit}" if subreddit else "r/legodeal"
         embed = {
+            **PostParser.EMBED_TEMPLATE,
             "title": post.title,
             "url": post.url,
-            "description": post.selftext[:2000] if post.selftext else "No description",  # Discord limit is 4096 for description, but we'll keep it shorter
-            "color": 16711680,  # Red color
+            # Slicing returns the selftext itself (no copy) when it is already short enough
+            "description": post.selftext[:PostParser.MAX_DESCRIPTION_LENGTH] if post.selftext else "No description",
             "footer": {
                 "text": subreddit_display
-            },
-            "timestamp": None  # Will be set by Discord if available
+            }
         }
         
         # Add image if available
@@ -502,3 +718,37 @@ class PostParser:
         
         return payload
 
+
+def _url_host(url: str) -> str:
+    """Return the lowercased host of a URL (no userinfo or port) using plain string slicing."""
+    # Only the (short) host is lowercased, never the whole URL
+    host_start = url.find("//")
+    host_start = 0 if host_start == -1 else host_start + 2
+    host_end = len(url)
+    for separator in ("/", "?", "#"):
+        index = url.find(separator, host_start, host_end)
+        if index != -1:
+            host_end = index
+    host = url[host_start:host_end]
+    if "@" in host:
+        host = host.rpartition("@")[2]
+    return host.partition(":")[0].lower()
+
+
+@functools.lru_cache(maxsize=4096)
+def _is_image_url(url: str) -> bool:
+    """Memoized image check behind PostParser.is_image_url (cache is shared by all threads)."""
+    host = _url_host(url)
+    
+    # Cheap reject for common deal/retailer pages, which make up most selftext links
+    if host.startswith("www."):
+        host = host[4:]
+    if host.startswith(PostParser.NON_IMAGE_HOST_PREFIXES):
+        return False
+    
+    # Check if it's a Reddit image domain
+    if PostParser.IMAGE_DOMAIN_MATCHER.search(url):
+        return True
+    
+    # Check file extension at the end of the path
+    return PostParser.IMAGE_EXTENSION_MATCHER.match(url) is not None
@@ -1,9 +1,14 @@
 """Reddit event listener using RSS feed polling."""
+import itertools
 import logging
-import time
+from collections import deque
+import threading
 import feedparser
 import requests
-from typing import Set, Callable, Optional
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Deque, Set, Callable, Optional, List, Dict, Any
+from xml.etree import ElementTree
 from datetime import datetime, timedelta, timezone
 from config import Config
 from post_parser import PostParser, ParsedPost
@@ -14,7 +19,12 @@ logger = logging.getLogger(__name__)
 class RedditListener:
     """Listens for new Reddit posts via RSS feed polling."""
     
-    def __init__(self, subreddit: str, config: Config, on_new_post: Callable[[ParsedPost], None]):
+    # Most post IDs remembered; the feed only lists the newest ~25 posts, so the
+    # oldest IDs can be forgotten without risking duplicate notifications
+    MAX_SEEN_POSTS = 5000
+    
+    def __init__(self, subreddit: str, config: Config, on_new_post: Callable[[ParsedPost], None],
+                 session: Optional[requests.Session] = None):
         """
         Initialize Reddit listener.
         
@@ -22,30 +32,79 @@ class RedditListener:
             subreddit: Subreddit name to monitor (without r/ prefix)
             config: Application configuration
             on_new_post: Callback function called when a new post is detected
+            session: HTTP session shared with other listeners (see create_session);
+                a private one is created if omitted
         """
         # Remove 'r/' prefix if present
         self.subreddit = subreddit[2:] if subreddit.startswith("r/") else subreddit
         self.config = config
         self.on_new_post = on_new_post
         self.seen_posts: Set[str] = set()
-        self.running = False
+        # Insertion order of seen_posts, used to evict the oldest IDs
+        self._seen_order: Deque[str] = deque()
+        # Cleared by stop(); checked between entries and polls
+        self.running = True
+        # Set by stop() so a blocking start() wakes from its sleep immediately
+        self._stop_event = threading.Event()
+        self.initialized = False
+        self.consecutive_failures = 0
+        # Seconds Reddit asked us to wait (Retry-After) before the next request
+        self.retry_after: Optional[int] = None
+        # Validators from the last full response, sent back as a conditional GET
+        self.etag: Optional[str] = None
+        self.last_modified: Optional[str] = None
         self.parser = PostParser()
-        self.rss_url = Config.get_rss_url(self.subreddit)
+        
+        # Keep-alive connection(s) to Reddit, reused across polls instead of a new
+        # TCP/TLS handshake every time
+        self.session = session or self.create_session()
+        
+        self.rss_url = config.RSS_URLS.get(self.subreddit) or Config.get_rss_url(self.subreddit)
     
-    def _fetch_feed(self) -> Optional[feedparser.FeedParserDict]:
+    @staticmethod
+    def create_session(pool_maxsize: int = 1, retry: Optional[Retry] = None) -> requests.Session:
+        """
+        Create an HTTP session for polling Reddit.
+        
+        Listeners driven from the same thread can share one session, so every
+        subreddit feed is fetched over the same pooled connection(s) to Reddit.
+        
+        Args:
+            pool_maxsize: Connections to keep open to Reddit
+            retry: urllib3 retry policy for failed requests (default: no retries; the
+                listener schedules its own backoff instead of blocking the poll loop)
+            
+        Returns:
+            Session with the Reddit User-Agent and a sized connection pool
+            (requests already asks for gzip/deflate bodies)
+        """
+        session = requests.Session()
+        # Reddit requires a User-Agent header
+        session.headers['User-Agent'] = 'BrickSniperDiscord/1.0 (Reddit RSS Reader)'
+        session.mount('https://', HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=pool_maxsize,
+            max_retries=retry if retry is not None else 0
+        ))
+        return session
+    
+    def _fetch_feed(self) -> Optional[List[Dict[str, Any]]]:
         """
         Fetch the Reddit RSS feed.
         
         Returns:
-            Parsed feed object, or None if fetch fails
+            Feed entries (newest first), an empty list if the feed is unchanged,
+            or None if the fetch fails
         """
         try:
-            # Reddit requires a User-Agent header
-            headers = {
-                'User-Agent': 'BrickSniperDiscord/1.0 (Reddit RSS Reader)'
-            }
+            # Conditional GET: Reddit answers 304 with no body if nothing changed
+            headers = {}
+            if self.etag:
+                headers['If-None-Match'] = self.etag
+            if self.last_modified:
+                headers['If-Modified-Since'] = self.last_modified
             
-            response = requests.get(self.rss_url, headers=headers, timeout=10)
+            response = self.session.get(self.rss_url, headers=headers, timeout=10)
             
             # Handle rate limiting (429)
             if response.status_code == 429:
@@ -55,20 +114,23 @@ class RedditListener:
                 except ValueError:
                     retry_seconds = 60
                 
+                # Don't sleep here: the caller schedules the next poll after Retry-After,
+                # so other listeners sharing the poll loop are not held up
                 logger.warning(f"Rate limited by Reddit. Waiting {retry_seconds} seconds before retry...")
-                time.sleep(retry_seconds)
-                # Retry once after waiting
-                response = requests.get(self.rss_url, headers=headers, timeout=10)
+                self.retry_after = retry_seconds
+                return None
             
-            response.raise_for_status()
+            if response.status_code == 304:
+                # Nothing new: a successful poll with no entries to process
+                logger.debug(f"Feed for r/{self.subreddit} not modified, skipping parse")
+                return []
             
-            # Parse the feed content
-            feed = feedparser.parse(response.content)
+            response.raise_for_status()
             
-            if feed.bozo and feed.bozo_exception:
-                logger.warning(f"Feed parsing warning: {feed.bozo_exception}")
+            self.etag = response.headers.get('ETag')
+            self.last_modified = response.headers.get('Last-Modified')
             
-            return feed
+            return self._parse_feed(response.content, response.headers.get('Content-Type', ''))
         except requests.exceptions.HTTPError as e:
             if e.response.status_code == 429:
                 logger.error(f"Rate limited by Reddit: {e}")
@@ -82,13 +144,88 @@ class RedditListener:
             logger.error(f"Unexpected error fetching feed: {e}")
             return None
     
-    def _process_entry(self, entry: feedparser.FeedParserDict) -> None:
+    def _parse_feed(self, content: bytes, content_type: str = '') -> List[Dict[str, Any]]:
+        """
+        Parse feed content into entries (see parse_feed_content).
+        
+        Args:
+            content: Raw feed document
+            content_type: Content-Type header of the response (gives feedparser the charset)
+            
+        Returns:
+            Feed entries (newest first)
+        """
+        return self.parse_feed_content(content, content_type, self.rss_url, self.config.FEED_PARSER)
+    
+    @staticmethod
+    def parse_feed_content(content: bytes, content_type: str, url: str, feed_parser: str = "fast",
+                           limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Parse a feed document into entries.
+        
+        Reddit serves well-formed Atom, so the fast ElementTree adapter handles the
+        normal case, streaming entries and stopping after `limit` of them;
+        feedparser's lenient parser (which always parses the whole document) is
+        only used if that fails, or always with FEED_PARSER=feedparser.
+        
+        Args:
+            content: Raw feed document
+            content_type: Content-Type header of the response (gives feedparser the charset)
+            url: Feed URL, for relative links and log messages
+            feed_parser: Config.FEED_PARSER ("fast" or "feedparser")
+            limit: Maximum number of entries to return (None for all)
+            
+        Returns:
+            Feed entries (newest first)
+        """
+        if feed_parser == "fast":
+            try:
+                return list(itertools.islice(PostParser.iter_entries_from_xml(content), limit))
+            except ElementTree.ParseError as e:
+                logger.warning(f"Feed {url} is not well-formed XML ({e}), falling back to feedparser")
+        
+        # Hand feedparser the HTTP headers we already have, so it uses the declared charset
+        # and resolves relative links against the feed URL without re-deriving either
+        feed = feedparser.parse(content, response_headers={
+            'content-type': content_type,
+            'content-location': url
+        })
+        
+        if feed.bozo and feed.bozo_exception:
+            logger.warning(f"Feed parsing warning for {url}: {feed.bozo_exception}")
+        
+        return feed.entries[:limit]
+    
+    def _add_seen(self, post_id: str) -> None:
+        """
+        Remember a post ID, forgetting the oldest one once MAX_SEEN_POSTS is reached.
+        
+        Args:
+            post_id: Reddit post ID
+        """
+        if post_id in self.seen_posts:
+            return
+        
+        if len(self._seen_order) >= self.MAX_SEEN_POSTS:
+            self.seen_posts.discard(self._seen_order.popleft())
+        
+        self._seen_order.append(post_id)
+        self.seen_posts.add(post_id)
+    
+    def _process_entry(self, entry: Dict[str, Any]) -> None:
         """
         Process a single feed entry.
         
         Args:
             entry: Feed entry to process
         """
+        # Skip already-seen posts before doing any HTML/URL parsing; between polls
+        # almost every entry in the feed is one we have already handled
+        post_id = PostParser.extract_post_id(entry.get("link", ""))
+        if post_id in self.seen_posts:
+            logger.debug(f"Post {post_id} already seen, skipping")
+            return
+        
         parsed_post = self.parser.parse_feed_entry(entry, affiliate_tag=self.config.AMAZON_AFFILIATE_TAG)
         
         if not parsed_post:
@@ -111,7 +248,7 @@ class RedditListener:
             if post_age > max_age:
                 logger.debug(f"Post {parsed_post.post_id} is {post_age.days} days old, skipping (max age: {max_age.days} days)")
                 # Still mark as seen to avoid processing it again
-                self.seen_posts.add(parsed_post.post_id)
+                self._add_seen(parsed_post.post_id)
                 return
         
         # Check if we've seen this post before
@@ -120,7 +257,7 @@ class RedditListener:
             return
         
         # Mark as seen
-        self.seen_posts.add(parsed_post.post_id)
+        self._add_seen(parsed_post.post_id)
         logger.info(f"New post detected: {parsed_post.title[:50]}...")
         
         # Call callback
@@ -129,71 +266,108 @@ class RedditListener:
         except Exception as e:
             logger.error(f"Error in on_new_post callback: {e}")
     
-    def _poll_once(self) -> None:
-        """Perform a single poll of the RSS feed."""
-        feed = self._fetch_feed()
+    def _poll_once(self) -> bool:
+        """
+        Perform a single poll of the RSS feed.
+        
+        Returns:
+            True if the feed was fetched (including 304 Not Modified), False otherwise
+        """
+        entries = self._fetch_feed()
         
-        if not feed:
+        if entries is None:
             # Don't log warning for rate limits - already logged in _fetch_feed
             # Only log if it's a different error
-            return
+            return False
         
         # Process entries in reverse order (oldest first) to maintain chronological order
-        # Feedparser typically returns newest first, so we reverse
-        entries = list(feed.entries)
-        entries.reverse()
-        
-        for entry in entries:
+        # Reddit feeds list newest first, so we iterate backwards (no copy of the list)
+        for entry in reversed(entries):
             if not self.running:
                 break
             self._process_entry(entry)
+        
+        return True
+    
+    def _initialize(self) -> None:
+        """Perform the initial poll that populates seen_posts (don't notify on startup)."""
+        if self.consecutive_failures == 0:
+            logger.info(f"Starting Reddit listener for r/{self.subreddit}")
+            logger.info(f"RSS URL: {self.rss_url}")
+            logger.info(f"Polling interval: {self.config.POLL_INTERVAL} seconds")
+        
+        logger.info("Performing initial poll to populate seen posts...")
+        entries = self._fetch_feed()
+        if entries is None:
+            # Retry on the next poll rather than treating every current post as new
+            self.consecutive_failures += 1
+            return
+        
+        # Only the post IDs are needed here, so skip the full entry parse
+        for entry in entries:
+            post_id = PostParser.extract_post_id(entry.get("link", ""))
+            if post_id:
+                self._add_seen(post_id)
+        self.initialized = True
+        self.consecutive_failures = 0
+        logger.info(f"Initialized with {len(self.seen_posts)} seen posts")
+    
+    def poll(self) -> float:
+        """
+        Run one poll cycle (the initial poll on first call).
+        
+        Lets a single scheduler drive many listeners without a thread per subreddit.
+        
+        Returns:
+            Seconds to wait before the next call
+        """
+        if not self.initialized:
+            self._initialize()
+        else:
+            try:
+                if self._poll_once():
+                    # Reset failure counter on success
+                    self.consecutive_failures = 0
+                else:
+                    # Failed or rate-limited fetch: back off before the next poll
+                    self.consecutive_failures += 1
+            except Exception as e:
+                logger.error(f"Unexpected error in poll loop: {e}")
+                self.consecutive_failures += 1
+        
+        # Use exponential backoff if we're getting rate limited
+        sleep_time = self.config.POLL_INTERVAL
+        if self.consecutive_failures > 0:
+            # Exponential backoff: 10s, 20s, 40s, max 60s
+            sleep_time = min(self.config.POLL_INTERVAL * (2 ** min(self.consecutive_failures, 3)), 60)
+            logger.info(f"Using backoff: sleeping {sleep_time} seconds before next poll")
+        
+        # Honour Reddit's Retry-After if it asked for a longer wait
+        if self.retry_after is not None:
+            sleep_time = max(sleep_time, self.retry_after)
+            self.retry_after = None
+        
+        return sleep_time
     
     def start(self) -> None:
         """Start the listener (blocking)."""
-        logger.info(f"Starting Reddit listener for r/{self.subreddit}")
-        logger.info(f"RSS URL: {self.rss_url}")
-        logger.info(f"Polling interval: {self.config.POLL_INTERVAL} seconds")
-        
         self.running = True
+        self._stop_event.clear()
         
-        # Initial poll to populate seen_posts (don't notify on startup)
-        logger.info("Performing initial poll to populate seen posts...")
-        feed = self._fetch_feed()
-        if feed:
-            for entry in feed.entries:
-                parsed_post = self.parser.parse_feed_entry(entry, affiliate_tag=self.config.AMAZON_AFFILIATE_TAG)
-                if parsed_post:
-                    self.seen_posts.add(parsed_post.post_id)
-            logger.info(f"Initialized with {len(self.seen_posts)} seen posts")
-        
-        # Start polling loop
-        consecutive_failures = 0
         while self.running:
             try:
-                self._poll_once()
-                # Reset failure counter on success
-                consecutive_failures = 0
+                sleep_time = self.poll()
             except KeyboardInterrupt:
                 logger.info("Received keyboard interrupt, stopping...")
                 self.stop()
                 break
-            except Exception as e:
-                logger.error(f"Unexpected error in poll loop: {e}")
-                consecutive_failures += 1
             
             if self.running:
-                # Use exponential backoff if we're getting rate limited
-                # Check if last fetch failed with 429
-                sleep_time = self.config.POLL_INTERVAL
-                if consecutive_failures > 0:
-                    # Exponential backoff: 10s, 20s, 40s, max 60s
-                    sleep_time = min(self.config.POLL_INTERVAL * (2 ** min(consecutive_failures, 3)), 60)
-                    logger.info(f"Using backoff: sleeping {sleep_time} seconds before next poll")
-                
-                time.sleep(sleep_time)
+                self._stop_event.wait(sleep_time)
     
     def stop(self) -> None:
         """Stop the listener."""
         logger.info("Stopping Reddit listener...")
         self.running = False
+        self._stop_event.set()
 
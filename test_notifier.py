@@ -1,12 +1,20 @@
 """Test script to fetch and send the last 5 newest posts."""
+import json
 import logging
+import os
+import queue
 import sys
-import time
+import threading
 import requests
-import feedparser
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from typing import Dict, Any, List, Optional, Set, Tuple
 from config import Config
-from post_parser import PostParser
-from discord_webhook import DiscordWebhook
+from post_parser import PostParser, ParsedPost
+from discord_webhook import DiscordWebhookGroup
+from reddit_listener import RedditListener
 
 # Configure logging
 logging.basicConfig(
@@ -16,13 +24,314 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Most feeds fetched at once
+MAX_FETCH_WORKERS = 8
 
-def test_notifier(num_posts: int = 5):
+# Formatted posts that may wait for the Discord sender
+SEND_QUEUE_SIZE = 64
+
+# Transient failures (connection errors, 429 and 5xx) are retried on the pooled connection,
+# honouring Retry-After, instead of failing the whole subreddit; 304 is never retried
+FETCH_RETRY = Retry(
+    total=3,
+    backoff_factor=0.5,
+    status_forcelist=(429, 500, 502, 503, 504),
+    allowed_methods=frozenset(['GET']),
+    respect_retry_after_header=True,
+    raise_on_status=False
+)
+
+# Shared keep-alive session for every feed download (User-Agent included), one pooled
+# connection per concurrent fetch so only the first request to Reddit pays for TCP/TLS setup
+SESSION = RedditListener.create_session(pool_maxsize=MAX_FETCH_WORKERS, retry=FETCH_RETRY)
+
+# Remembers feed validators and sent post IDs between --only-new runs; kept next to this
+# script (where .gitignore expects it) whatever the working directory
+STATE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".test_notifier_state.json")
+
+# Most sent post IDs kept in the state file (oldest are dropped first)
+MAX_SENT_IDS = 10000
+
+# Concurrent image checks, and how long each may take before the image is kept anyway
+IMAGE_CHECK_WORKERS = 8
+IMAGE_CHECK_TIMEOUT = 2
+
+# 4xx answers that say nothing about whether Discord can fetch the image
+IMAGE_CHECK_KEEP_STATUSES = frozenset([403, 405, 429])
+
+
+def create_image_session() -> requests.Session:
+    """
+    Create the HTTP session for image checks.
+    
+    Kept apart from SESSION so image hosts never evict the pooled Reddit
+    connection, the Reddit User-Agent is not sent to third-party hosts, and
+    FETCH_RETRY's retries cannot stretch a check past IMAGE_CHECK_TIMEOUT.
+    
+    Returns:
+        Session with a pool per image host and no retries
+    """
+    session = requests.Session()
+    session.headers['User-Agent'] = 'BrickSniperDiscord/1.0'
+    adapter = HTTPAdapter(
+        pool_connections=IMAGE_CHECK_WORKERS,
+        pool_maxsize=IMAGE_CHECK_WORKERS,
+        max_retries=0
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+IMAGE_SESSION = create_image_session()
+
+
+def load_state() -> Dict[str, Any]:
+    """
+    Load the saved --only-new state.
+    
+    Returns:
+        State dictionary ({"feeds": {subreddit: {"etag": ..., "last_modified": ...}},
+        "sent": [post IDs, oldest first]})
+    """
+    try:
+        with open(STATE_FILE, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except FileNotFoundError:
+        return {"feeds": {}, "sent": []}
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable state file {STATE_FILE}: {e}")
+        return {"feeds": {}, "sent": []}
+    
+    state.setdefault("feeds", {})
+    state.setdefault("sent", [])
+    return state
+
+
+def save_state(state: Dict[str, Any]) -> None:
+    """
+    Save the --only-new state for the next run.
+    
+    Args:
+        state: State dictionary from load_state()
+    """
+    # Drop repeats (keeping first-sent order) and the oldest IDs beyond the cap
+    state["sent"] = list(dict.fromkeys(state["sent"]))[-MAX_SENT_IDS:]
+    try:
+        with open(STATE_FILE, "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=2)
+    except OSError as e:
+        logger.warning(f"Could not save state file {STATE_FILE}: {e}")
+
+
+def fetch_feed(rss_url: str, validators: Optional[Dict[str, str]] = None) -> requests.Response:
+    """
+    Download a Reddit RSS feed.
+    
+    Args:
+        rss_url: Feed URL (see Config.get_rss_url / Config.get_combined_rss_url)
+        validators: ETag/Last-Modified from a previous run; if given, the request is
+            conditional and Reddit answers 304 Not Modified when the feed is unchanged
+        
+    Returns:
+        HTTP response with the feed document (or an empty 304 response)
+    """
+    logger.info(f"Fetching feed from: {rss_url}")
+    
+    headers = {}
+    if validators:
+        if validators.get("etag"):
+            headers['If-None-Match'] = validators["etag"]
+        if validators.get("last_modified"):
+            headers['If-Modified-Since'] = validators["last_modified"]
+    
+    response = SESSION.get(rss_url, headers=headers, timeout=10)
+    response.raise_for_status()
+    return response
+
+
+def parse_feed(response: requests.Response, limit: Optional[int] = None,
+               feed_parser: str = "fast") -> List[Dict[str, Any]]:
+    """
+    Parse a feed document into entries (see RedditListener.parse_feed_content).
+    
+    Only called from the feed worker threads (load_feed / load_combined_feed), so
+    the blocking parse of one feed overlaps with other downloads and with the
+    Discord sends instead of holding up the main thread.
+    
+    Args:
+        response: HTTP response with the feed document
+        limit: Maximum number of entries to return (None for all)
+        feed_parser: Config.FEED_PARSER ("fast" or "feedparser")
+        
+    Returns:
+        Feed entries (newest first)
+    """
+    return RedditListener.parse_feed_content(
+        response.content,
+        response.headers.get('Content-Type', ''),
+        response.url,
+        feed_parser,
+        limit
+    )
+
+
+def image_reachable(image_url: str) -> bool:
+    """
+    Check that an embed image can be fetched before Discord tries to.
+    
+    Only a definitive "not there" answer counts as broken: a 4xx status other than
+    403 (HEAD or our User-Agent refused), 405 (HEAD not allowed) and 429 (rate
+    limited), or a URL requests cannot fetch at all. Timeouts, connection and SSL
+    errors and 5xx responses may be transient or specific to this client, so the
+    image is kept and Discord gets to try it.
+    
+    Args:
+        image_url: Image URL of a parsed post
+        
+    Returns:
+        False if the image is known to be gone, True otherwise
+    """
+    try:
+        response = IMAGE_SESSION.head(image_url, timeout=IMAGE_CHECK_TIMEOUT, allow_redirects=True)
+    except (requests.exceptions.Timeout, requests.exceptions.ConnectionError):
+        return True
+    except requests.exceptions.RequestException:
+        return False
+    status = response.status_code
+    return not (400 <= status < 500) or status in IMAGE_CHECK_KEEP_STATUSES
+
+
+@dataclass
+class FeedResult:
+    """A downloaded subreddit feed with its newest posts already parsed."""
+    response: requests.Response
+    # Entries read from the feed (at most the number of posts requested)
+    entry_count: int = 0
+    # One entry per post sent, newest first; None where the entry could not be parsed
+    posts: List[Optional[ParsedPost]] = field(default_factory=list)
+
+
+def load_feed(subreddit: str, rss_url: str, validators: Optional[Dict[str, str]], num_posts: int,
+              affiliate_tag: str, feed_parser: str = "fast") -> FeedResult:
+    """
+    Download, parse and extract the newest posts of one subreddit feed.
+    
+    Runs in a worker thread, so every subreddit's network and parsing work
+    overlaps with the others.
+    
+    Args:
+        subreddit: Subreddit name (without r/ prefix)
+        rss_url: The subreddit's feed URL (Config.RSS_URLS)
+        validators: ETag/Last-Modified from a previous run (see fetch_feed)
+        num_posts: Number of newest posts to parse
+        affiliate_tag: Amazon affiliate tag for detected links
+        feed_parser: Config.FEED_PARSER (see parse_feed)
+        
+    Returns:
+        FeedResult (with no posts if the feed was not modified)
+    """
+    response = fetch_feed(rss_url, validators)
+    if response.status_code == 304:
+        return FeedResult(response)
+    
+    # Only the newest N entries are read from the feed (it lists newest first)
+    entries = parse_feed(response, limit=num_posts, feed_parser=feed_parser)
+    
+    posts = [
+        PostParser.parse_feed_entry(entry, affiliate_tag=affiliate_tag)
+        for entry in entries
+    ]
+    return FeedResult(response, len(entries), posts)
+
+
+def load_combined_feed(subreddits: Tuple[str, ...], validators: Optional[Dict[str, str]],
+                       num_posts: int, affiliate_tag: str,
+                       feed_parser: str = "fast") -> Dict[str, FeedResult]:
+    """
+    Download every subreddit in one combined feed request and split it per subreddit.
+    
+    Args:
+        subreddits: Subreddit names (without r/ prefix)
+        validators: ETag/Last-Modified of the combined feed from a previous run
+        num_posts: Number of newest posts to parse per subreddit
+        affiliate_tag: Amazon affiliate tag for detected links
+        feed_parser: Config.FEED_PARSER (see parse_feed)
+        
+    Returns:
+        FeedResult per subreddit, all sharing the combined feed's response
+    """
+    response = fetch_feed(Config.get_combined_rss_url(subreddits), validators)
+    if response.status_code == 304:
+        return {subreddit: FeedResult(response) for subreddit in subreddits}
+    
+    entries = parse_feed(response, feed_parser=feed_parser)
+    
+    # Bucket entries by the subreddit in their permalink (names are case-insensitive)
+    buckets: Dict[str, List[Dict[str, Any]]] = {subreddit.lower(): [] for subreddit in subreddits}
+    for entry in entries:
+        bucket = buckets.get((PostParser.extract_subreddit(entry.get("link", "")) or "").lower())
+        if bucket is not None:
+            bucket.append(entry)
+    
+    results = {}
+    for subreddit in subreddits:
+        bucket = buckets[subreddit.lower()]
+        posts = [
+            PostParser.parse_feed_entry(entry, affiliate_tag=affiliate_tag)
+            for entry in bucket[:num_posts]
+        ]
+        results[subreddit] = FeedResult(response, len(bucket), posts)
+    return results
+
+
+def send_worker(discord: DiscordWebhookGroup,
+                send_queue: "queue.Queue[Optional[Tuple[str, int, str, Dict[str, Any]]]]",
+                counts: Dict[str, List[int]], counts_lock: threading.Lock,
+                unsent: Set[str], sent_ids: Optional[List[str]] = None) -> None:
+    """
+    Thread function that sends queued posts to Discord until it receives None.
+    
+    Args:
+        discord: Webhook sender(s) (rate-limited; sends to several webhooks concurrently)
+        send_queue: Queue of (subreddit, post number, post ID, payload) items
+        counts: Per-subreddit [sent, failed] counts to update
+        counts_lock: Lock guarding counts, unsent (and sent_ids)
+        unsent: Subreddits with a post that failed to send are added to it
+        sent_ids: If given, the IDs of successfully sent posts are appended to it
+    """
+    while True:
+        item = send_queue.get()
+        if item is None:
+            break
+        
+        subreddit, i, post_id, payload = item
+        logger.info("Sending post %d from r/%s to Discord...", i, subreddit)
+        success = discord.send_post(payload)
+        
+        if success:
+            logger.info("✓ Successfully sent post %d from r/%s", i, subreddit)
+        else:
+            logger.error("✗ Failed to send post %d from r/%s", i, subreddit)
+        
+        with counts_lock:
+            counts[subreddit][0 if success else 1] += 1
+            if not success:
+                unsent.add(subreddit)
+            elif sent_ids is not None:
+                sent_ids.append(post_id)
+
+
+def test_notifier(num_posts: int = 5, only_new: bool = False, combined: bool = False):
     """
     Test the notifier by fetching and sending the last N newest posts.
     
     Args:
         num_posts: Number of posts to fetch and send (default: 5)
+        only_new: Skip feeds that have not changed since the last --only-new run,
+            and posts that an earlier --only-new run already sent
+        combined: Fetch every subreddit in one combined feed request (posts per
+            subreddit are then limited to those in the combined feed's newest 25)
     """
     logger.info("=" * 60)
     logger.info("BrickSniper Discord - Test Mode")
@@ -39,104 +348,174 @@ def test_notifier(num_posts: int = 5):
         sys.exit(1)
     
     # Initialize components
-    discord = DiscordWebhook(config.DISCORD_WEBHOOK_URL)
+    discord = DiscordWebhookGroup(config.DISCORD_WEBHOOK_URLS)
     parser = PostParser()
     
+    # Settings used for every post, bound once
+    affiliate_tag = config.AMAZON_AFFILIATE_TAG
+    role_mention = config.LEGO_ROLE_MENTION or None
+    rss_urls = config.RSS_URLS
+    feed_parser = config.FEED_PARSER
+    format_post = parser.format_for_discord
+    
     # Process each subreddit
     subreddits = config.SUBREDDITS
     logger.info(f"Testing {len(subreddits)} subreddit(s): {', '.join(f'r/{s}' for s in subreddits)}")
     
-    total_success = 0
-    total_fail = 0
+    # Per-subreddit [sent, failed] counts, updated by the sender thread too
+    counts: Dict[str, List[int]] = {subreddit: [0, 0] for subreddit in subreddits}
+    counts_lock = threading.Lock()
+    # Subreddits whose posts were not all delivered (guarded by counts_lock)
+    unsent: Set[str] = set()
     
-    for subreddit in subreddits:
-        logger.info(f"\n{'=' * 60}")
-        logger.info(f"Testing r/{subreddit}")
-        logger.info(f"{'=' * 60}")
-        
-        # Fetch the RSS feed
-        rss_url = Config.get_rss_url(subreddit)
-        logger.info(f"Fetching feed from: {rss_url}")
-        try:
-            # Reddit requires a User-Agent header
-            headers = {
-                'User-Agent': 'BrickSniperDiscord/1.0 (Reddit RSS Reader)'
-            }
-            
-            response = requests.get(rss_url, headers=headers, timeout=10)
-            response.raise_for_status()
-            
-            # Parse the feed content
-            feed = feedparser.parse(response.content)
-            
-            if feed.bozo and feed.bozo_exception:
-                logger.warning(f"Feed parsing warning: {feed.bozo_exception}")
-            
-            if not feed.entries:
-                logger.warning(f"No entries found in r/{subreddit}. The subreddit may be empty or the feed may be unavailable.")
-                continue
-            
-            logger.info(f"Found {len(feed.entries)} entries in feed")
-            
-            # Process the last N posts (feedparser returns newest first)
-            posts_to_send = feed.entries[:num_posts]
-            logger.info(f"Processing {len(posts_to_send)} posts from r/{subreddit}...")
-            
-            success_count = 0
-            fail_count = 0
+    # Feed validators saved by the previous --only-new run
+    state = load_state() if only_new else None
+    feed_state = state["feeds"] if state else {}
+    already_sent = set(state["sent"]) if state else set()
+    # Validators of the feeds downloaded by this run, saved once their posts are delivered
+    new_validators: Dict[str, Dict[str, Optional[str]]] = {}
+    
+    # Download and parse every feed concurrently up front (the feeds are independent),
+    # then queue them in the configured order; total load time is the slowest feed, not the sum
+    # (with --combined a single request covers every subreddit)
+    combined = combined and len(subreddits) > 1
+    combined_key = "+".join(subreddits)
+    executor = ThreadPoolExecutor(max_workers=1 if combined else min(MAX_FETCH_WORKERS, len(subreddits)))
+    if combined:
+        combined_load = executor.submit(load_combined_feed, subreddits, feed_state.get(combined_key),
+                                        num_posts, affiliate_tag, feed_parser)
+        loads = [(subreddit, combined_load) for subreddit in subreddits]
+    else:
+        loads = [
+            (subreddit, executor.submit(load_feed, subreddit, rss_urls[subreddit],
+                                        feed_state.get(subreddit), num_posts, affiliate_tag, feed_parser))
+            for subreddit in subreddits
+        ]
+    executor.shutdown(wait=False)
+    
+    # A single sender thread posts queued payloads in FIFO order, so the Discord channel and
+    # the log keep the configured subreddit order (each webhook's rate limit caps throughput
+    # anyway, and DiscordWebhookGroup already sends to several webhooks concurrently). It runs
+    # while this thread is still working through the remaining feeds; the bounded queue holds
+    # back this thread if Discord falls behind
+    send_queue: "queue.Queue[Optional[Tuple[str, int, str, Dict[str, Any]]]]" = queue.Queue(maxsize=SEND_QUEUE_SIZE)
+    sender = threading.Thread(
+        target=send_worker,
+        args=(discord, send_queue, counts, counts_lock, unsent, state["sent"] if state else None),
+        name="DiscordSender"
+    )
+    sender.start()
+    
+    # HEAD checks of embed images, run while earlier posts are being formatted and sent
+    image_executor = ThreadPoolExecutor(max_workers=IMAGE_CHECK_WORKERS, thread_name_prefix="ImageCheck")
+    
+    try:
+        for subreddit, load in loads:
+            logger.info(f"\n{'=' * 60}")
+            logger.info(f"Testing r/{subreddit}")
+            logger.info(f"{'=' * 60}")
             
-            for i, entry in enumerate(posts_to_send, 1):
-                logger.info(f"\n--- Processing post {i}/{len(posts_to_send)} from r/{subreddit} ---")
+            try:
+                # Wait for this subreddit's RSS feed
+                result = load.result()[subreddit] if combined else load.result()
+                response = result.response
                 
-                # Parse the post
-                parsed_post = parser.parse_feed_entry(entry, affiliate_tag=config.AMAZON_AFFILIATE_TAG)
-                
-                if not parsed_post:
-                    logger.warning(f"Failed to parse post {i}, skipping...")
-                    fail_count += 1
+                if response.status_code == 304:
+                    logger.info(f"Feed for r/{subreddit} not modified since the last run, skipping")
                     continue
                 
-                logger.info(f"Title: {parsed_post.title[:60]}...")
-                logger.info(f"Post ID: {parsed_post.post_id}")
-                logger.info(f"URL: {parsed_post.url}")
-                if parsed_post.detected_link:
-                    logger.info(f"Detected link: {parsed_post.detected_link}")
-                if parsed_post.image_url:
-                    logger.info(f"Image URL: {parsed_post.image_url}")
+                if state is not None:
+                    new_validators[combined_key if combined else subreddit] = {
+                        "etag": response.headers.get('ETag'),
+                        "last_modified": response.headers.get('Last-Modified')
+                    }
+                
+                if not result.entry_count:
+                    logger.warning(f"No entries found in r/{subreddit}. The subreddit may be empty or the feed may be unavailable.")
+                    continue
                 
-                # Format for Discord
-                payload = parser.format_for_discord(
-                    parsed_post, 
-                    affiliate_tag=config.AMAZON_AFFILIATE_TAG,
-                    lego_role_mention=config.LEGO_ROLE_MENTION if config.LEGO_ROLE_MENTION else None,
-                    subreddit=subreddit
-                )
+                logger.info(f"Read {result.entry_count} newest entries from feed")
                 
-                # Send to Discord
-                logger.info("Sending to Discord...")
-                success = discord.send_post(payload)
+                # Process the last N posts (already parsed by the worker)
+                posts_to_send = result.posts
+                total = len(posts_to_send)
+                logger.info(f"Processing {total} posts from r/{subreddit}...")
                 
-                if success:
-                    logger.info(f"✓ Successfully sent post {i} from r/{subreddit}")
-                    success_count += 1
-                else:
-                    logger.error(f"✗ Failed to send post {i} from r/{subreddit}")
-                    fail_count += 1
+                # Check every image up front so the checks overlap; each post waits only for its own
+                image_checks = {
+                    post.post_id: image_executor.submit(image_reachable, post.image_url)
+                    for post in posts_to_send
+                    if post and post.image_url and post.post_id not in already_sent
+                }
                 
-                # Small delay between posts to avoid rate limiting
-                if i < len(posts_to_send):
-                    time.sleep(1)
-            
-            total_success += success_count
-            total_fail += fail_count
+                # Per-post messages use lazy %-formatting, so nothing is built when INFO is off
+                for i, parsed_post in enumerate(posts_to_send, 1):
+                    logger.info("\n--- Processing post %d/%d from r/%s ---", i, total, subreddit)
+                    
+                    if not parsed_post:
+                        logger.warning("Failed to parse post %d, skipping...", i)
+                        with counts_lock:
+                            counts[subreddit][1] += 1
+                        continue
+                    
+                    if parsed_post.post_id in already_sent:
+                        logger.info("Post %s was sent by an earlier run, skipping", parsed_post.post_id)
+                        continue
+                    
+                    logger.info("Title: %.60s...", parsed_post.title)
+                    logger.info("Post ID: %s", parsed_post.post_id)
+                    logger.info("URL: %s", parsed_post.url)
+                    if parsed_post.detected_link:
+                        logger.info("Detected link: %s", parsed_post.detected_link)
+                    if parsed_post.image_url:
+                        logger.info("Image URL: %s", parsed_post.image_url)
+                    
+                    # Drop a broken image rather than let Discord fail to fetch it
+                    image_check = image_checks.get(parsed_post.post_id)
+                    if image_check is not None and not image_check.result():
+                        logger.warning("Image for post %s is unreachable, sending without it", parsed_post.post_id)
+                        parsed_post = replace(parsed_post, image_url=None)
+                    
+                    # Format for Discord
+                    payload = format_post(
+                        parsed_post, 
+                        affiliate_tag=affiliate_tag,
+                        lego_role_mention=role_mention,
+                        subreddit=subreddit
+                    )
+                    
+                    # Hand off to the sender thread
+                    send_queue.put((subreddit, i, parsed_post.post_id, payload))
             
-            logger.info(f"\n--- Summary for r/{subreddit} ---")
-            logger.info(f"Successfully sent: {success_count}")
-            logger.info(f"Failed: {fail_count}")
+            except Exception as e:
+                logger.error(f"Error processing r/{subreddit}: {e}", exc_info=True)
+                with counts_lock:
+                    unsent.add(subreddit)
+                continue
+    finally:
+        image_executor.shutdown(wait=False, cancel_futures=True)
+        # The sender exits once the queue ahead of the sentinel is drained
+        send_queue.put(None)
+        sender.join()
+    
+    if state is not None:
+        # Keep a feed's new validators only if every post queued from it was delivered;
+        # otherwise the next run would get 304 and never retry the failed posts
+        for key, validators in new_validators.items():
+            if unsent.isdisjoint(subreddits if combined else (key,)):
+                feed_state[key] = validators
+        save_state(state)
+    
+    total_success = 0
+    total_fail = 0
+    for subreddit in subreddits:
+        success_count, fail_count = counts[subreddit]
+        total_success += success_count
+        total_fail += fail_count
         
-        except Exception as e:
-            logger.error(f"Error processing r/{subreddit}: {e}", exc_info=True)
-            continue
+        logger.info(f"\n--- Summary for r/{subreddit} ---")
+        logger.info(f"Successfully sent: {success_count}")
+        logger.info(f"Failed: {fail_count}")
     
     # Overall Summary
     logger.info("\n" + "=" * 60)
@@ -161,6 +540,17 @@ def main():
         default=5,
         help="Number of posts to fetch and send (default: 5)"
     )
+    parser.add_argument(
+        "--only-new",
+        action="store_true",
+        help=f"Skip feeds that have not changed and posts already sent since the last --only-new run (state kept in {STATE_FILE})"
+    )
+    parser.add_argument(
+        "--combined",
+        action="store_true",
+        help="Fetch all subreddits in one combined feed request (r/a+b); "
+             "each subreddit only gets the posts that appear in that feed"
+    )
     
     args = parser.parse_args()
     
@@ -175,7 +565,11 @@ def main():
             logger.info("Test cancelled.")
             sys.exit(0)
     
-    test_notifier(args.num_posts)
+    try:
+        test_notifier(args.num_posts, only_new=args.only_new, combined=args.combined)
+    finally:
+        SESSION.close()
+        IMAGE_SESSION.close()
 
 
 if __name__ == "__main__":